@@ -1,14 +1,63 @@
 import httpx
-import json
 import asyncio
-from typing import Dict, Optional, Any, Union, List, TypedDict
+import random
+from typing import Dict, Optional, Any, TypedDict
 
+# 优先使用orjson解析API响应（比标准库json快数倍），未安装时回退到标准库
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from nonebot import get_driver
 from nonebot.log import logger
 
-from .config import Config, plugin_config
+from .cache import hitokoto_cache, RANDOM_TYPE_KEY
+from .config import Config, plugin_config, TYPE_CODE_TO_NAME
 
 # 固定的请求超时时间（10秒）
 TIMEOUT = 10
+# 最大请求次数（含首次请求）
+MAX_RETRIES = 3
+# 重试基础等待时间（秒），实际等待为指数退避加随机抖动
+RETRY_DELAY = 1.0
+
+# 预计算小写类型名称到类型代码的映射，避免每次调用时线性扫描类型映射表
+_TYPE_LOOKUP: Dict[str, str] = {
+    name.lower(): code for name, code in plugin_config.hitp_type_map.items()
+}
+
+# 回复模板在启动后不会变化，绑定为模块常量避免每次格式化时读取配置对象
+_TEMPLATE: str = plugin_config.hitp_template
+
+# 进程内共享的HTTP客户端，复用连接池避免每次请求重建TCP/TLS连接
+_client: Optional[httpx.AsyncClient] = None
+
+# 进行中的上游请求 {type_key: Task}，相同类型的并发请求共享同一个结果
+_inflight: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+
+# 后台补充缓存池的目标条目数：命中时池子低于该值就追加一次上游请求
+_POOL_FILL_TARGET = min(plugin_config.hitp_cache_size, 20)
+
+
+def _get_client() -> httpx.AsyncClient:
+    """获取共享的HTTP客户端，不存在或已关闭时重建"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(TIMEOUT, connect=3.0),
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=32,
+                max_keepalive_connections=16,
+                keepalive_expiry=60.0
+            ),
+            headers={
+                "Accept-Encoding": "gzip, br",
+                "User-Agent": "nonebot-plugin-hitokoto-plus"
+            }
+        )
+    return _client
 
 
 class HitokotoResponse(TypedDict, total=False):
@@ -50,37 +99,88 @@ async def get_hitokoto(
         hitokoto_type = hitokoto_type.strip()
         logger.debug(f"处理类型参数: {hitokoto_type}, 类型映射表: {plugin_config.hitp_type_map}")
         
-        # 如果提供的是中文类型名称，转换为对应的类型代码
-        if hitokoto_type in plugin_config.hitp_type_map:
-            params["c"] = plugin_config.hitp_type_map[hitokoto_type]
-            logger.debug(f"找到类型映射: {hitokoto_type} -> {params['c']}")
+        # 如果提供的是中文类型名称，转换为对应的类型代码（查找不区分大小写）
+        if (code := _TYPE_LOOKUP.get(hitokoto_type.lower())) is not None:
+            params["c"] = code
+            logger.debug(f"找到类型映射: {hitokoto_type} -> {code}")
         else:
-            # 尝试进行不区分大小写的匹配
-            matched = False
-            for name, code in plugin_config.hitp_type_map.items():
-                if name.lower() == hitokoto_type.lower():
-                    params["c"] = code
-                    logger.debug(f"不区分大小写匹配到类型: {name} -> {code}")
-                    matched = True
-                    break
-            
-            # 如果仍然没有匹配，则假设提供的直接是类型代码
-            if not matched:
-                params["c"] = hitokoto_type
+            # 没有匹配时，假设提供的直接是类型代码
+            params["c"] = hitokoto_type
             logger.debug(f"使用原始类型代码: {hitokoto_type}")
     elif plugin_config.hitp_default_type:
         params["c"] = plugin_config.hitp_default_type
+
+    # 缓存按类型代码分池，未指定类型时使用随机池
+    type_key = params.get("c", RANDOM_TYPE_KEY)
+
+    # 先尝试本地缓存，命中时无需请求API
+    if plugin_config.hitp_enable_cache:
+        cached = hitokoto_cache.get_random(type_key)
+        if cached is not None:
+            logger.debug(f"命中本地缓存，类型: {type_key}")
+            # 命中不能阻止池子增长：池内句子不足时在后台补充一条
+            _fill_pool_in_background(params, type_key)
+            return cached
+
+    # 相同类型的并发未命中请求合并为一次上游调用，避免重复请求API
+    task = _inflight.get(type_key)
+    if task is None:
+        task = asyncio.create_task(_request_hitokoto(params, type_key))
+        _inflight[type_key] = task
+        task.add_done_callback(lambda _t, _key=type_key: _inflight.pop(_key, None))
+    return await task
+
+
+def _fill_pool_in_background(params: Dict[str, str], type_key: str) -> None:
+    """缓存命中时在后台补充缓存池
+
+    池内句子未达到目标数量且当前没有进行中的同类型请求时，
+    发起一次不阻塞当前回复的上游请求，让缓存池逐步积累到目标规模。
+    """
+    if hitokoto_cache.pool_size(type_key) >= _POOL_FILL_TARGET:
+        return
+    if type_key in _inflight:
+        return
+    # 传入参数副本，后台任务对参数的修改不影响调用方
+    task = asyncio.create_task(_request_hitokoto(dict(params), type_key))
+    _inflight[type_key] = task
+    task.add_done_callback(lambda _t, _key=type_key: _finish_background_fill(_t, _key))
+
+
+def _finish_background_fill(task: "asyncio.Task[Dict[str, Any]]", type_key: str) -> None:
+    """后台补充任务结束后的清理：移出进行中映射并取出异常，避免未消费异常告警"""
+    _inflight.pop(type_key, None)
+    if not task.cancelled() and task.exception() is not None:
+        logger.debug(f"后台补充缓存池失败: {task.exception()}")
+
+
+async def _request_hitokoto(params: Dict[str, str], type_key: str) -> Dict[str, Any]:
+    """
+    向一言API发起请求（含重试），并将结果写入缓存
+    
+    参数:
+        params: 请求参数
+        type_key: 缓存池类型键
         
+    返回:
+        Dict[str, Any]: 一言数据
+    
+    异常:
+        APIError: API调用失败
+    """
     # 添加JSON格式参数
     params["encode"] = "json"
-    
-    try:
-        async with httpx.AsyncClient() as client:
+
+    last_error: Optional[APIError] = None
+    last_exc: Optional[Exception] = None
+
+    for attempt in range(MAX_RETRIES):
+        try:
+            client = _get_client()
             logger.debug(f"正在请求一言API: {plugin_config.hitp_api_url}，参数: {params}")
             response = await client.get(
                 str(plugin_config.hitp_api_url), 
-                params=params,
-                timeout=TIMEOUT  # 使用固定超时时间
+                params=params
             )
             
             # 记录完整请求URL
@@ -90,7 +190,10 @@ async def get_hitokoto(
             response.raise_for_status()
             
             # 解析JSON响应
-            data: Dict[str, Any] = response.json()
+            if orjson is not None:
+                data: Dict[str, Any] = orjson.loads(response.content)
+            else:
+                data = response.json()
             logger.debug(f"API返回数据: {data}")
             
             # 对返回数据进行处理，确保某些字段存在
@@ -105,41 +208,56 @@ async def get_hitokoto(
                 data["from_who"] = ""
                 data["from_who_plain"] = "无"
             else:
+                # 先保留原始作者名，再生成带括号的展示形式，避免加括号后又strip还原
+                data["from_who_plain"] = data["from_who"]
                 data["from_who"] = f"「{data['from_who']}」"
-                data["from_who_plain"] = data["from_who"].strip("「」")
                 
-            # 添加类型的中文名称
+            # 添加类型的中文名称（预计算的反向映射表，O(1)查找）
             if "type" in data:
-                # 反向查找类型映射表，获取中文名称
                 type_code = data["type"]
-                type_name = "未知类型"
-                # 使用next()函数替代for循环查找匹配的类型名称
-                try:
-                    type_name = next(name for name, code in plugin_config.hitp_type_map.items() if code == type_code)
-                except StopIteration:
-                    pass
+                type_name = TYPE_CODE_TO_NAME.get(type_code, "未知类型")
                 data["type_name"] = type_name
                 logger.debug(f"API返回类型代码: {type_code}, 映射为类型名称: {type_name}")
             else:
                 data["type_name"] = "未知类型"
-                
+
+            # 写入本地缓存，供后续请求复用
+            if plugin_config.hitp_enable_cache:
+                hitokoto_cache.add(data, type_key)
+
             return data
-            
-    except httpx.TimeoutException as e:
-        logger.error("请求一言API超时")
-        raise APIError("请求一言API超时，请稍后再试") from e
-    except httpx.HTTPStatusError as e:
-        logger.error(f"请求一言API失败: HTTP {e.response.status_code}")
-        raise APIError(f"请求一言API失败: HTTP {e.response.status_code}") from e
-    except httpx.RequestError as e:
-        logger.error(f"请求一言API网络错误: {str(e)}")
-        raise APIError(f"请求一言API网络错误: {str(e)}") from e
-    except json.JSONDecodeError as e:
-        logger.error("一言API返回非JSON数据")
-        raise APIError("一言API返回数据解析失败") from e
-    except Exception as e:
-        logger.exception("获取一言时发生未知错误")
-        raise APIError(f"获取一言时发生未知错误: {str(e)}") from e
+                
+        except httpx.TimeoutException as e:
+            logger.error("请求一言API超时")
+            last_error, last_exc = APIError("请求一言API超时，请稍后再试"), e
+        except httpx.HTTPStatusError as e:
+            logger.error(f"请求一言API失败: HTTP {e.response.status_code}")
+            api_error = APIError(f"请求一言API失败: HTTP {e.response.status_code}")
+            # 4xx属于请求本身的问题，重试没有意义，直接抛出
+            if e.response.status_code < 500:
+                raise api_error from e
+            last_error, last_exc = api_error, e
+        except httpx.RequestError as e:
+            logger.error(f"请求一言API网络错误: {str(e)}")
+            last_error, last_exc = APIError(f"请求一言API网络错误: {str(e)}"), e
+        except ValueError as e:
+            # json.JSONDecodeError与orjson.JSONDecodeError均为ValueError的子类
+            logger.error("一言API返回非JSON数据")
+            raise APIError("一言API返回数据解析失败") from e
+        except APIError:
+            raise
+        except Exception as e:
+            logger.exception("获取一言时发生未知错误")
+            raise APIError(f"获取一言时发生未知错误: {str(e)}") from e
+
+        # 指数退避加随机抖动后重试，避免各用户的重试同时打到上游；最后一次失败不再等待
+        if attempt < MAX_RETRIES - 1:
+            delay = RETRY_DELAY * (2 ** attempt) * (0.5 + random.random())
+            logger.debug(f"第{attempt + 1}次请求失败，{delay:.2f}秒后重试")
+            await asyncio.sleep(delay)
+
+    # 所有重试均失败
+    raise last_error from last_exc
 
 
 def format_hitokoto(data: Dict[str, Any]) -> str:
@@ -153,11 +271,41 @@ def format_hitokoto(data: Dict[str, Any]) -> str:
         str: 格式化后的一言文本
     """
     try:
-        return plugin_config.hitp_template.format(**data)
+        return _TEMPLATE.format(**data)
     except KeyError as e:
         logger.warning(f"格式化一言时缺少字段: {e}")
         # 使用一个简单的备用模板
         return f"{data['hitokoto']}"
     except Exception as e:
         logger.exception("格式化一言时发生错误")
-        return f"{data['hitokoto']}" 
\ No newline at end of file
+        return f"{data['hitokoto']}"
+
+
+driver = get_driver()
+
+
+async def _warmup_fetch(type_key: str) -> Dict[str, Any]:
+    """预热专用的获取函数：直接请求上游并写入缓存
+
+    绕过get_hitokoto的缓存命中检查和并发合并——预热的目的就是
+    发出per_type次真实请求填满池子，走常规入口只会命中已缓存的
+    第一条句子，每个类型实际只预热一条。
+    """
+    params = {} if type_key == RANDOM_TYPE_KEY else {"c": type_key}
+    return await _request_hitokoto(params, type_key)
+
+
+@driver.on_startup
+async def _warmup_cache() -> None:
+    """启动时按配置预热缓存"""
+    if plugin_config.hitp_enable_cache and plugin_config.hitp_cache_warmup_types:
+        await hitokoto_cache.warmup(_warmup_fetch, plugin_config.hitp_cache_warmup_types)
+
+
+@driver.on_shutdown
+async def _close_client() -> None:
+    """退出时关闭共享HTTP客户端"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None 
\ No newline at end of file
@@ -0,0 +1,367 @@
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+from collections import deque
+import asyncio
+import json
+import random
+import time
+from pathlib import Path
+
+# 优先使用orjson读写缓存文件（比标准库json快数倍），未安装时回退到标准库
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from nonebot import get_driver
+from nonebot.log import logger
+
+# 导入localstore
+import nonebot_plugin_localstore as store
+
+from .config import plugin_config
+
+# 没有指定类型时使用的缓存键
+RANDOM_TYPE_KEY = "random"
+# 过期条目清理间隔（秒）
+CLEANUP_INTERVAL = 1800
+# 缓存池可直接命中所需的最小句子数：池子太小时继续走上游请求积累句子，
+# 否则首条句子会被反复返回，池子也永远没有增长的机会
+MIN_POOL_TO_SERVE = 5
+# 预热时对上游API的最大并发请求数
+WARMUP_CONCURRENCY = 8
+
+
+class LRUCache:
+    """基于普通dict的定容缓存，写入O(1)
+
+    Python 3.7起dict保证插入顺序，相比OrderedDict内存占用约小一半。
+
+    不变式：条目只经put写入并携带写入时间戳，迭代顺序即写入时间
+    从旧到新。get_random的早停扫描和cleanup的从最旧端删除都依赖
+    这一点——不要在不更新时间戳的情况下重排条目。
+    """
+
+    def __init__(self, max_size: int) -> None:
+        """
+        初始化缓存
+
+        参数:
+            max_size: 缓存条目数量上限，超出时淘汰写入最早的条目
+        """
+        self.max_size = max_size
+        # 条目为 (写入时间戳, 一言数据) 元组，比每条目一个包装dict更省内存
+        self.cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+    def put(self, key: str, value: Tuple[float, Dict[str, Any]]) -> None:
+        """写入缓存条目，超出容量时淘汰写入最早的条目"""
+        if key in self.cache:
+            del self.cache[key]
+        self.cache[key] = value
+        if len(self.cache) > self.max_size:
+            # 插入顺序最早的条目即写入时间最早
+            del self.cache[next(iter(self.cache))]
+
+    def __len__(self) -> int:
+        return len(self.cache)
+
+
+class _Stats:
+    """缓存命中统计
+
+    带__slots__的普通类：热路径上的计数只是一次槽位读写，
+    不再对字符串键做哈希查找。
+    """
+
+    __slots__ = ("hits", "misses", "last_cleanup")
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.last_cleanup = time.time()
+
+
+class RecentlyUsed:
+    """有界的"最近返回"记录
+
+    deque负责按插入顺序淘汰最旧记录，set提供O(1)成员判断，
+    因此去重窗口随缓存池变大时成员判断也不会退化为线性扫描。
+    （与布隆过滤器目的相同，但无需第三方依赖且没有误判。）
+    """
+
+    __slots__ = ("_order", "_members")
+
+    def __init__(self, capacity: int) -> None:
+        self._order: Deque[str] = deque(maxlen=capacity)
+        self._members: Set[str] = set()
+
+    def __contains__(self, uuid: str) -> bool:
+        return uuid in self._members
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def add(self, uuid: str) -> None:
+        """记录一个UUID，写满时自动挤出最旧的记录"""
+        if uuid in self._members:
+            return
+        if self._order.maxlen is not None and len(self._order) == self._order.maxlen and self._order:
+            self._members.discard(self._order[0])
+        self._order.append(uuid)
+        self._members.add(uuid)
+
+    def clear(self) -> None:
+        """清空全部记录"""
+        self._order.clear()
+        self._members.clear()
+
+
+class HitokotoCache:
+    """一言本地缓存
+
+    按类型维护最近从API获取的句子池，命中时直接返回缓存结果，
+    减少对上游API的请求次数和用户可见延迟。
+    """
+
+    def __init__(self) -> None:
+        """初始化一言缓存"""
+        self.max_size = plugin_config.hitp_cache_size
+        self.ttl = plugin_config.hitp_cache_ttl
+        # 每个类型一个LRU缓存 {type_key: LRUCache}
+        self.caches: Dict[str, LRUCache] = {}
+        # 最近返回过的句子UUID，避免短时间内重复 {type_key: RecentlyUsed}
+        self.recently_used: Dict[str, RecentlyUsed] = {}
+        self.recently_used_size = max(self.max_size // 2, 1)
+        # 缓存统计
+        self.stats = _Stats()
+        self.cleanup_interval = CLEANUP_INTERVAL
+        # 缓存文件路径 - 使用localstore，目录只需创建一次
+        self.cache_file = self._get_cache_file_path()
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+
+    def _get_cache(self, type_key: str) -> LRUCache:
+        """获取指定类型的LRU缓存，不存在时创建"""
+        lru_cache = self.caches.get(type_key)
+        if lru_cache is None:
+            lru_cache = self.caches[type_key] = LRUCache(self.max_size)
+        return lru_cache
+
+    def add(self, sentence: Dict[str, Any], type_key: str) -> None:
+        """
+        将一条句子加入缓存
+
+        参数:
+            sentence: API返回的一言数据
+            type_key: 类型代码，未指定类型时为 random
+        """
+        uuid = sentence.get("uuid")
+        if not uuid:
+            return
+        # 直接引用调用方的dict：数据进入缓存后各处只读不改，无需防御性拷贝
+        self._get_cache(type_key).put(uuid, (time.time(), sentence))
+        self._maybe_cleanup()
+
+    def pool_size(self, type_key: str) -> int:
+        """获取指定类型缓存池的当前条目数"""
+        lru_cache = self.caches.get(type_key)
+        return len(lru_cache) if lru_cache is not None else 0
+
+    def get_random(self, type_key: str) -> Optional[Dict[str, Any]]:
+        """
+        从缓存中随机取出一条未过期且近期未返回过的句子
+
+        参数:
+            type_key: 类型代码，未指定类型时为 random
+
+        返回:
+            Optional[Dict[str, Any]]: 命中的一言数据，缓存为空或全部过期时返回None
+        """
+        self._maybe_cleanup()
+        lru_cache = self.caches.get(type_key)
+        if not lru_cache or not len(lru_cache):
+            self.stats.misses += 1
+            return None
+
+        current_time = time.time()
+        # 条目按写入时间从旧到新排列，过期条目集中在最旧端；
+        # 找到第一条未过期的条目即可停止比较，其后的条目必然有效
+        values = list(lru_cache.cache.values())
+        fresh_start = len(values)
+        for idx, item in enumerate(values):
+            if current_time - item[0] < self.ttl:
+                fresh_start = idx
+                break
+        valid_items = values[fresh_start:]
+        if len(valid_items) < min(MIN_POOL_TO_SERVE, self.max_size):
+            # 池内句子不足时按未命中处理，让调用方继续请求上游填充池子
+            self.stats.misses += 1
+            return None
+
+        # 单遍水塘抽样：在近期未返回过的条目中等概率选取一条，
+        # 无需先构建候选列表再random.choice
+        recently = self.recently_used.get(type_key)
+        if recently is None:
+            recently = self.recently_used[type_key] = RecentlyUsed(self.recently_used_size)
+        chosen_item = None
+        count = 0
+        for item in valid_items:
+            if item[1].get("uuid") in recently:
+                continue
+            count += 1
+            if random.random() * count < 1:
+                chosen_item = item
+
+        if chosen_item is None:
+            # 全部句子最近都返回过，重置去重记录后重新选取
+            recently.clear()
+            chosen_item = random.choice(valid_items)
+
+        recently.add(chosen_item[1].get("uuid", ""))
+
+        self.stats.hits += 1
+        return chosen_item[1]
+
+    def _maybe_cleanup(self) -> None:
+        """距上次清理超过间隔时顺带清理一次过期条目
+
+        借助正常的读写调用摊销清理开销，无需常驻后台任务；
+        空闲时不会有协程被定时唤醒。
+        """
+        if time.time() - self.stats.last_cleanup > self.cleanup_interval:
+            self.cleanup()
+
+    def cleanup(self) -> None:
+        """清理所有类型中已过期的缓存条目"""
+        current_time = time.time()
+        removed = 0
+        for lru_cache in self.caches.values():
+            # 条目按写入时间从旧到新排列，从最旧端逐条删除，
+            # 遇到第一条未过期的条目即可停止，无需扫描整个池
+            cache = lru_cache.cache
+            while cache:
+                oldest_key = next(iter(cache))
+                if current_time - cache[oldest_key][0] < self.ttl:
+                    break
+                del cache[oldest_key]
+                removed += 1
+
+        self.stats.last_cleanup = current_time
+        if removed:
+            logger.debug(f"已清理 {removed} 条过期的一言缓存")
+
+    async def warmup(
+        self,
+        fetch: Callable[[Optional[str]], Awaitable[Dict[str, Any]]],
+        types: List[str],
+        per_type: int = 10
+    ) -> None:
+        """
+        启动时预热缓存，并发拉取各类型的若干句子
+
+        各类型的请求一并发出，由信号量限制总并发数，
+        避免逐类型串行预热拖慢启动。
+
+        参数:
+            fetch: 直接请求上游并写入缓存的协程函数（不走缓存命中路径）
+            types: 需要预热的类型代码列表
+            per_type: 每个类型预热的请求次数
+        """
+        sem = asyncio.Semaphore(WARMUP_CONCURRENCY)
+
+        async def _fetch_one(type_key: str) -> None:
+            async with sem:
+                await fetch(type_key)
+
+        tasks = {
+            type_key: [asyncio.ensure_future(_fetch_one(type_key)) for _ in range(per_type)]
+            for type_key in types
+        }
+        await asyncio.gather(
+            *(task for type_tasks in tasks.values() for task in type_tasks),
+            return_exceptions=True
+        )
+
+        for type_key, type_tasks in tasks.items():
+            errors = [task.exception() for task in type_tasks if task.exception() is not None]
+            if errors:
+                logger.warning(f"预热类型 {type_key} 失败: {errors[0]}")
+            logger.info(f"缓存预热: 类型 {type_key} 完成 {per_type - len(errors)}/{per_type} 次请求")
+
+    def _get_cache_file_path(self) -> Path:
+        """获取缓存文件路径"""
+        return store.get_plugin_cache_file("hitokoto_cache.json")
+
+    def save_to_file(self) -> None:
+        """将缓存内容保存到文件"""
+        try:
+            save_data = {
+                "stats": {
+                    "hits": self.stats.hits,
+                    "misses": self.stats.misses,
+                    "last_cleanup": self.stats.last_cleanup,
+                },
+                "caches": {
+                    type_key: dict(lru_cache.cache)
+                    for type_key, lru_cache in self.caches.items()
+                },
+            }
+            if orjson is not None:
+                payload = orjson.dumps(save_data, option=orjson.OPT_INDENT_2)
+            else:
+                payload = json.dumps(save_data, ensure_ascii=False, indent=2).encode("utf-8")
+            self.cache_file.write_bytes(payload)
+            logger.debug("一言缓存保存成功")
+        except Exception as e:
+            logger.error(f"保存一言缓存失败: {e}")
+
+    def load_from_file(self) -> None:
+        """从文件加载缓存内容，过期条目直接丢弃"""
+        if not self.cache_file.exists():
+            logger.debug("一言缓存文件不存在，跳过加载")
+            return
+
+        try:
+            raw = self.cache_file.read_bytes()
+            if orjson is not None:
+                save_data = orjson.loads(raw)
+            else:
+                save_data = json.loads(raw)
+
+            current_time = time.time()
+            loaded = 0
+            for type_key, items in save_data.get("caches", {}).items():
+                lru_cache = self._get_cache(type_key)
+                for uuid, item in items.items():
+                    # JSON中元组以数组形式存储
+                    timestamp, sentence = item[0], item[1]
+                    if current_time - timestamp < self.ttl:
+                        lru_cache.put(uuid, (timestamp, sentence))
+                        loaded += 1
+
+            stats = save_data.get("stats", {})
+            self.stats.hits = stats.get("hits", 0)
+            self.stats.misses = stats.get("misses", 0)
+            logger.debug(f"成功加载一言缓存: {loaded}条")
+        except Exception as e:
+            logger.error(f"加载一言缓存失败: {e}")
+
+
+# 创建全局缓存实例
+hitokoto_cache = HitokotoCache()
+
+driver = get_driver()
+
+
+@driver.on_startup
+async def _init_cache() -> None:
+    """启动时加载缓存"""
+    if not plugin_config.hitp_enable_cache:
+        return
+    hitokoto_cache.load_from_file()
+
+
+@driver.on_shutdown
+async def _save_cache() -> None:
+    """退出前保存缓存"""
+    if not plugin_config.hitp_enable_cache:
+        return
+    hitokoto_cache.save_to_file()
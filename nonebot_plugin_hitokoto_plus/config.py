@@ -3,6 +3,16 @@ from typing import Optional, Dict, Any, List, Set
 from nonebot.compat import BaseModel
 from nonebot import get_plugin_config
 
+try:
+    from pydantic import field_validator
+except ImportError:  # pydantic v1
+    from pydantic import validator as field_validator
+
+
+# 一言API支持的类型代码集合
+# 用frozenset做成员判断：子串判断会放行"ab"这类多字符值，集合判断则要求完全匹配
+_VALID_TYPE_CODES = frozenset("abcdefghijkl")
+
 
 class Config(BaseModel):
     """一言+插件配置"""
@@ -41,8 +51,36 @@ class Config(BaseModel):
     # 黑白名单配置
     hitp_use_whitelist: bool = False  # 是否启用白名单模式，True为白名单，False为黑名单
     hitp_user_list: List[str] = []  # 用户ID列表，格式为"platform:user_id"
-    hitp_group_list: List[str] = []  # 群组ID列表，格式为"platform:group_id" 
+    hitp_group_list: List[str] = []  # 群组ID列表，格式为"platform:group_id"
+
+    # 本地缓存配置
+    hitp_enable_cache: bool = True  # 是否启用一言本地缓存
+    hitp_cache_size: int = 100  # 每种类型缓存的句子数量上限
+    hitp_cache_ttl: int = 3600  # 缓存有效期（秒），默认1小时
+    hitp_cache_warmup_types: List[str] = []  # 启动时预热的类型代码列表，如["a", "b"]
+
+    @field_validator("hitp_default_type")
+    @classmethod
+    def check_default_type(cls, v: Optional[str]) -> Optional[str]:
+        """校验默认类型代码"""
+        if v is not None and v not in _VALID_TYPE_CODES:
+            raise ValueError(f"无效的一言类型代码: {v}")
+        return v
+
+    @field_validator("hitp_cache_warmup_types")
+    @classmethod
+    def check_warmup_types(cls, v: List[str]) -> List[str]:
+        """校验预热类型代码列表"""
+        invalid = set(v) - _VALID_TYPE_CODES
+        if invalid:
+            raise ValueError(f"无效的一言类型代码: {', '.join(sorted(invalid))}")
+        return v
 
 
 # 获取插件配置，这样其他模块可以直接导入
-plugin_config = get_plugin_config(Config) 
\ No newline at end of file
+plugin_config = get_plugin_config(Config)
+
+# 类型代码到中文名称的反向映射，按代码查名称时无需线性扫描类型映射表
+TYPE_CODE_TO_NAME: Dict[str, str] = {
+    code: name for name, code in plugin_config.hitp_type_map.items()
+} 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 import time
 from datetime import datetime
 
@@ -32,6 +32,9 @@ hitokoto_cmd = on_alconna(
 # 格式: {platform:user_id: last_time}
 last_call_time: Dict[str, float] = {}
 
+# 收藏提示在启动后不会变化，预先拼接为常量避免每条消息重新构建
+FAVORITE_HINT = f"\n----------\n在 {plugin_config.hitp_favorite_timeout} 秒内使用 /一言收藏 命令收藏该句"
+
 # 延迟导入，避免在模块加载时导入
 def setup_scheduler():
     """设置定时任务"""
@@ -83,17 +86,14 @@ async def handle_hitokoto(event: Event, result: CommandResult, session: Uninfo)
     
     hitokoto_type: Optional[str] = None
     
-    # 获取跨平台用户标识
-    platform = session.adapter
-    user_id = session.user.id
+    # 获取跨平台用户标识并检查黑白名单
+    ids = get_session_user(session)
+    if ids is None:
+        return
+    platform, user_id = ids
     # 创建复合ID用于频率限制
     composite_id = f"{platform}:{user_id}"
     
-    # 检查黑白名单
-    if not check_permission(session):
-        logger.debug(f"用户 {composite_id} 因黑白名单限制被拒绝访问")
-        return
-    
     # 检查频率限制
     if not await rate_limiter.check_rate_limit(composite_id, hitokoto_cmd.send):
         return
@@ -124,7 +124,7 @@ async def handle_hitokoto(event: Event, result: CommandResult, session: Uninfo)
         formatted_hitokoto = format_hitokoto(hitokoto_data)
         
         # 添加收藏提示
-        formatted_hitokoto += f"\n----------\n在 {plugin_config.hitp_favorite_timeout} 秒内使用 /一言收藏 命令收藏该句"
+        formatted_hitokoto += FAVORITE_HINT
         
         # 使用send方法发送消息，不使用finish
         await hitokoto_cmd.send(formatted_hitokoto)
@@ -143,6 +143,26 @@ async def handle_hitokoto(event: Event, result: CommandResult, session: Uninfo)
         raise new_error from e
 
 
+def get_session_user(session) -> Optional[Tuple[str, str]]:
+    """
+    获取会话的跨平台用户标识，并检查黑白名单权限
+
+    各处理函数共用此入口，避免重复展开session属性和权限判断代码。
+
+    参数:
+        session: 会话对象
+
+    返回:
+        Optional[Tuple[str, str]]: (platform, user_id)，无权限时返回None
+    """
+    platform = session.adapter
+    user_id = session.user.id
+    if not check_permission(session):
+        logger.debug(f"用户 {platform}:{user_id} 因黑白名单限制被拒绝访问")
+        return None
+    return platform, user_id
+
+
 def check_permission(session) -> bool:
     """
     检查黑白名单权限
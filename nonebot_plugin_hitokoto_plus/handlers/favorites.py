@@ -1,11 +1,7 @@
 from typing import Optional, List
-import math
-import time
-from datetime import datetime
 
 from nonebot.adapters import Event
 from nonebot.log import logger
-from nonebot import get_driver
 from nonebot_plugin_alconna import on_alconna, Args, Alconna, CommandResult, Option
 from nonebot_plugin_alconna.uniseg import UniMessage, Text, At
 
@@ -13,16 +9,20 @@ from nonebot_plugin_alconna.uniseg import UniMessage, Text, At
 from nonebot_plugin_uninfo import Uninfo
 
 from ..config import Config, plugin_config
-from ..models import favorite_manager, HitokotoFavorite
-from .basic import check_permission
+from ..models import favorite_manager
+from .basic import get_session_user
 from ..api import get_hitokoto, format_hitokoto, APIError
 from ..rate_limiter import rate_limiter
+from ..utils import cmd_prefix
 
-# 获取全局配置
-global_config = get_driver().config
-# 获取命令前缀，默认为 "/"
-cmd_start = getattr(global_config, "command_start", {"/", })
-cmd_prefix = next(iter(cmd_start)) if cmd_start else "/"
+# 每页显示的收藏条数在启动后不会变化，绑定为模块常量避免每条命令读取配置对象
+_PAGE_SIZE = plugin_config.hitp_favorite_list_limit
+
+# 列表末尾的操作提示在启动后不会变化，预先拼接为常量
+_LIST_FOOTER_HINTS = (
+    f"使用 {cmd_prefix}一言查看收藏 [序号] 查看详情\n"
+    f"使用 {cmd_prefix}一言删除收藏 [序号] 删除收藏"
+)
 
 # 创建收藏相关命令
 favorite_list_cmd = on_alconna(
@@ -67,17 +67,14 @@ delete_favorite_cmd = on_alconna(
 async def handle_favorite_list(event: Event, result: CommandResult, session: Uninfo) -> None:
     """处理收藏列表命令"""
     
-    # 获取跨平台用户标识
-    platform = session.adapter
-    user_id = session.user.id
+    # 获取跨平台用户标识并检查黑白名单
+    ids = get_session_user(session)
+    if ids is None:
+        return
+    platform, user_id = ids
     user_name = session.user.name  # 获取用户昵称
     composite_id = f"{platform}:{user_id}"
     
-    # 检查黑白名单
-    if not check_permission(session):
-        logger.debug(f"用户 {composite_id} 因黑白名单限制被拒绝访问收藏列表")
-        return
-    
     # 检查频率限制
     if not await rate_limiter.check_rate_limit(composite_id, favorite_list_cmd.send):
         return
@@ -87,71 +84,65 @@ async def handle_favorite_list(event: Event, result: CommandResult, session: Uni
     if result.result and "-p" in result.result.options and (page_arg := result.result.options["-p"]) and "page" in page_arg:
             page = max(1, page_arg["page"])
     
-    # 获取用户收藏列表
-    favorites = favorite_manager.get_favorites(platform, user_id)
-    
-    # 计算总页数
-    page_size = plugin_config.hitp_favorite_list_limit
-    total_pages = max(1, math.ceil(len(favorites) / page_size))
-    
-    # 确保页码有效
-    page = min(page, total_pages)
-    
-    # 计算当前页的收藏
-    start_idx = (page - 1) * page_size
-    end_idx = min(start_idx + page_size, len(favorites))
-    current_page_favorites = favorites[start_idx:end_idx]
-    
-    if not favorites:
+    # 只取当前页的收藏，分页切片由管理器完成
+    current_page_favorites, total = favorite_manager.get_favorites_page(
+        platform, user_id, page, _PAGE_SIZE
+    )
+
+    # 计算总页数（整数向上取整，避免浮点除法和math.ceil调用）
+    total_pages = max(1, (total + _PAGE_SIZE - 1) // _PAGE_SIZE)
+
+    # 页码超出范围时取最后一页重新获取
+    if page > total_pages:
+        page = total_pages
+        current_page_favorites, total = favorite_manager.get_favorites_page(
+            platform, user_id, page, _PAGE_SIZE
+        )
+    start_idx = (page - 1) * _PAGE_SIZE
+
+    if not total:
         await favorite_list_cmd.send("您还没有收藏任何一言")
         return
-    
-    # 构建收藏列表消息
-    msg_list = [
-        f"{user_name} 的一言收藏",
-        f"（{page}/{total_pages}页，共{len(favorites)}条）",
-        "----------"
-    ]
 
-    msg_list.extend([
+    # 当前页条目，每条内容最多截取30个字符
+    entries = "\n".join(
         f"{i}. {fav.content[:30] + '...' if len(fav.content) > 30 else fav.content}"
         for i, fav in enumerate(current_page_favorites, start=start_idx + 1)
-    ])
-    
-    msg_list.append("----------")
-    
-    # 根据总页数添加不同的提示
+    )
+
+    # 根据总页数生成翻页提示
     if total_pages > 1:
-        if page < total_pages:
-            msg_list.append(f"使用 {cmd_prefix}一言收藏列表 -p {page+1} 查看下一页")
-        else:
-            msg_list.append(f"已经是最后一页")
-        
-        if page > 1:
-            msg_list.append(f"使用 {cmd_prefix}一言收藏列表 -p {page-1} 查看上一页")
-    
-    # 添加操作提示
-    msg_list.extend([
-        f"使用 {cmd_prefix}一言查看收藏 [序号] 查看详情",
-        f"使用 {cmd_prefix}一言删除收藏 [序号] 删除收藏"
-    ])
-    
-    await favorite_list_cmd.send("\n".join(msg_list))
+        next_hint = (
+            f"使用 {cmd_prefix}一言收藏列表 -p {page + 1} 查看下一页\n"
+            if page < total_pages else "已经是最后一页\n"
+        )
+        prev_hint = f"使用 {cmd_prefix}一言收藏列表 -p {page - 1} 查看上一页\n" if page > 1 else ""
+        page_hints = next_hint + prev_hint
+    else:
+        page_hints = ""
+
+    # 整条消息一次性拼接完成，不经过中间列表的逐项append
+    await favorite_list_cmd.send(
+        f"{user_name} 的一言收藏\n"
+        f"（{page}/{total_pages}页，共{total}条）\n"
+        "----------\n"
+        f"{entries}\n"
+        "----------\n"
+        f"{page_hints}"
+        f"{_LIST_FOOTER_HINTS}"
+    )
 
 
 @add_favorite_cmd.handle()
 async def handle_add_favorite(event: Event, session: Uninfo) -> None:
     """处理收藏命令"""
     
-    # 获取跨平台用户标识
-    platform = session.adapter
-    user_id = session.user.id
-    composite_id = f"{platform}:{user_id}"
-    
-    # 检查黑白名单
-    if not check_permission(session):
-        logger.debug(f"用户 {composite_id} 因黑白名单限制被拒绝访问收藏功能")
+    # 获取跨平台用户标识并检查黑白名单
+    ids = get_session_user(session)
+    if ids is None:
         return
+    platform, user_id = ids
+    composite_id = f"{platform}:{user_id}"
     
     # 检查频率限制
     if not await rate_limiter.check_rate_limit(composite_id, add_favorite_cmd.send):
@@ -164,13 +155,13 @@ async def handle_add_favorite(event: Event, session: Uninfo) -> None:
         return
         
     # 检查是否已经收藏
-    if favorite_manager.is_favorite_exists(platform, user_id, hitokoto_data.uuid):
+    if favorite_manager.is_favorite_exists(platform, user_id, hitokoto_data.get("uuid", "")):
         await add_favorite_cmd.send("该一言已经收藏过了")
         return
     
     # 添加收藏
-    favorite_manager.add_favorite(platform, user_id, hitokoto_data)
-    logger.info(f"用户 {composite_id} 收藏了一言: {hitokoto_data.content[:20]}...")
+    await favorite_manager.add_favorite(platform, user_id, hitokoto_data)
+    logger.info(f"用户 {composite_id} 收藏了一言: {hitokoto_data['hitokoto'][:20]}...")
     
     # 使用send方法发送消息
     await add_favorite_cmd.send(f"收藏成功！可以使用 {cmd_prefix}一言收藏列表 命令查看您的收藏列表")
@@ -180,15 +171,12 @@ async def handle_add_favorite(event: Event, session: Uninfo) -> None:
 async def handle_view_favorite(event: Event, result: CommandResult, session: Uninfo) -> None:
     """处理查看收藏命令"""
     
-    # 获取跨平台用户标识
-    platform = session.adapter
-    user_id = session.user.id
-    composite_id = f"{platform}:{user_id}"
-    
-    # 检查黑白名单
-    if not check_permission(session):
-        logger.debug(f"用户 {composite_id} 因黑白名单限制被拒绝访问收藏查看功能")
+    # 获取跨平台用户标识并检查黑白名单
+    ids = get_session_user(session)
+    if ids is None:
         return
+    platform, user_id = ids
+    composite_id = f"{platform}:{user_id}"
     
     # 检查频率限制
     if not await rate_limiter.check_rate_limit(composite_id, view_favorite_cmd.send):
@@ -217,35 +205,34 @@ async def handle_view_favorite(event: Event, result: CommandResult, session: Uni
     # 获取指定收藏，注意索引从0开始
     favorite = favorites[index - 1]
     
-    # 构建收藏消息
-    msg = f"收藏序号: {index}\n"
-    msg += f"内容: {favorite.content}\n"
-    msg += f"类型: {favorite.type_name}\n"
-    
+    # 构建收藏消息（列表+join，避免反复拼接字符串）
+    msg_list = [
+        f"收藏序号: {index}",
+        f"内容: {favorite.content}",
+        f"类型: {favorite.type_name}",
+    ]
+
     if favorite.source:
-        msg += f"来源: {favorite.source}\n"
-    
+        msg_list.append(f"来源: {favorite.source}")
+
     if favorite.creator:
-        msg += f"作者: {favorite.creator}\n"
-    
-    msg += f"收藏时间: {favorite.created_at.strftime('%Y-%m-%d %H:%M:%S')}"
-    
-    await view_favorite_cmd.send(msg)
+        msg_list.append(f"作者: {favorite.creator}")
+
+    msg_list.append(f"收藏时间: {favorite.created_at.strftime('%Y-%m-%d %H:%M:%S')}")
+
+    await view_favorite_cmd.send("\n".join(msg_list))
 
 
 @delete_favorite_cmd.handle()
 async def handle_delete_favorite(event: Event, result: CommandResult, session: Uninfo) -> None:
     """处理删除收藏命令"""
     
-    # 获取跨平台用户标识
-    platform = session.adapter
-    user_id = session.user.id
-    composite_id = f"{platform}:{user_id}"
-    
-    # 检查黑白名单
-    if not check_permission(session):
-        logger.debug(f"用户 {composite_id} 因黑白名单限制被拒绝访问收藏删除功能")
+    # 获取跨平台用户标识并检查黑白名单
+    ids = get_session_user(session)
+    if ids is None:
         return
+    platform, user_id = ids
+    composite_id = f"{platform}:{user_id}"
     
     # 检查频率限制
     if not await rate_limiter.check_rate_limit(composite_id, delete_favorite_cmd.send):
@@ -273,9 +260,11 @@ async def handle_delete_favorite(event: Event, result: CommandResult, session: U
     
     # 获取指定收藏，注意索引从0开始
     favorite = favorites[index - 1]
-    
-    # 删除收藏
-    favorite_manager.delete_favorite(platform, user_id, favorite.uuid)
+
+    # 按索引删除收藏，无需再按UUID查找一次
+    if not await favorite_manager.remove_favorite(platform, user_id, index - 1):
+        await delete_favorite_cmd.send("删除收藏失败，请稍后再试")
+        return
     logger.info(f"用户 {composite_id} 删除了收藏: {favorite.content[:20]}...")
     
     # 使用send方法发送消息
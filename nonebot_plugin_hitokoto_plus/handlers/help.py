@@ -1,18 +1,14 @@
-from typing import List, Set
-
 from nonebot.log import logger
-from nonebot import get_driver
 from nonebot_plugin_alconna import on_alconna, Alconna, CommandResult, Subcommand
 
 from ..config import Config, plugin_config
+from ..utils import cmd_prefix
 
-# 获取全局配置
-global_config = get_driver().config
-
-# 获取命令前缀集合，如果没有配置则默认为 ["/"]
-cmd_start: Set[str] = getattr(global_config, "command_start", {"/", })
-# 使用第一个命令前缀作为帮助显示
-cmd_prefix = next(iter(cmd_start)) if cmd_start else "/"
+# 类型映射表在启动后不会变化，预先拼接类型列表文本，
+# 重复调用 一言帮助 类型 时无需每次遍历映射表
+_TYPES_LIST = "\n".join(
+    f"- {name} (代码: {code})" for name, code in plugin_config.hitp_type_map.items()
+)
 
 # 创建帮助命令
 help_cmd = on_alconna(
@@ -47,9 +43,11 @@ async def handle_help(result: CommandResult) -> None:
         await help_cmd.send(get_general_help())
 
 
-def get_general_help() -> str:
-    """获取总帮助信息"""
-    help_text: List[str] = [
+# 帮助文本只依赖启动时加载的配置，全部在导入时拼接完成，
+# 处理帮助命令时直接返回现成字符串，不再逐条构建列表
+def _build_general_help() -> str:
+    """构建总帮助信息"""
+    help_text = [
         "🌟 一言+插件帮助 🌟",
         "------------------------",
         "",
@@ -66,9 +64,9 @@ def get_general_help() -> str:
     return "\n".join(help_text)
 
 
-def get_basic_help() -> str:
-    """获取基础命令帮助"""
-    help_text: List[str] = [
+def _build_basic_help() -> str:
+    """构建基础命令帮助"""
+    help_text = [
         "📖 一言+·基础命令帮助 📖",
         "------------------------",
         "命令格式：",
@@ -87,9 +85,9 @@ def get_basic_help() -> str:
     return "\n".join(help_text)
 
 
-def get_favorite_help() -> str:
-    """获取收藏功能帮助"""
-    help_text: List[str] = [
+def _build_favorite_help() -> str:
+    """构建收藏功能帮助"""
+    help_text = [
         "💾 一言+·收藏功能帮助 💾",
         "------------------------",
         "命令列表：",
@@ -107,19 +105,15 @@ def get_favorite_help() -> str:
     return "\n".join(help_text)
 
 
-def get_types_help() -> str:
-    """获取类型帮助信息"""
-    type_map = plugin_config.hitp_type_map
-    
-    help_text: List[str] = [
+def _build_types_help() -> str:
+    """构建类型帮助信息"""
+    help_text = [
         "📋 一言支持的类型 📋",
         "------------------------",
-        "支持的类型列表："
+        "支持的类型列表：",
+        _TYPES_LIST
     ]
-    
-    # 使用列表推导式添加类型列表
-    help_text.extend([f"- {name} (代码: {code})" for name, code in type_map.items()])
-    
+
     help_text.extend([
         "",
         "使用方法：",
@@ -127,4 +121,30 @@ def get_types_help() -> str:
         "- 不指定类型则随机获取"
     ])
     
-    return "\n".join(help_text) 
\ No newline at end of file
+    return "\n".join(help_text) 
+
+
+_GENERAL_HELP = _build_general_help()
+_BASIC_HELP = _build_basic_help()
+_FAVORITE_HELP = _build_favorite_help()
+_TYPES_HELP = _build_types_help()
+
+
+def get_general_help() -> str:
+    """获取总帮助信息"""
+    return _GENERAL_HELP
+
+
+def get_basic_help() -> str:
+    """获取基础命令帮助"""
+    return _BASIC_HELP
+
+
+def get_favorite_help() -> str:
+    """获取收藏功能帮助"""
+    return _FAVORITE_HELP
+
+
+def get_types_help() -> str:
+    """获取类型帮助信息"""
+    return _TYPES_HELP
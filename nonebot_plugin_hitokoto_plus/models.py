@@ -1,50 +1,69 @@
-from typing import Dict, List, Optional, Any, TypedDict, Union
+from typing import Dict, List, Optional, Any, Set, Tuple
+from dataclasses import dataclass
 from datetime import datetime
+import asyncio
+import functools
 import json
 import os
+import time
 from pathlib import Path
+from urllib.parse import quote
+
+# 优先使用orjson进行序列化（比标准库json快数倍），未安装时回退到标准库
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from nonebot import get_driver
 from nonebot.log import logger
 
 # 导入localstore
 import nonebot_plugin_localstore as store
+from nonebot_plugin_apscheduler import scheduler
+
+from .config import plugin_config
+
+# 保存去抖动时间（秒），短时间内的连续修改会合并为一次写盘；
+# 窗口取0.5秒：足以吞掉一波连续收藏操作，又不会让数据长时间停留在内存
+FLUSH_DEBOUNCE = 0.5
+# 过期"最后一言"记录的清理间隔（秒）
+LAST_HITOKOTO_CLEANUP_INTERVAL = 60
+# "最后一言"记录条数上限，超出时按最久未更新淘汰，内存占用与总用户数解耦
+LAST_HITOKOTO_MAX_ENTRIES = 10_000
+
 
+@functools.lru_cache(maxsize=4096)
+def _parse_ts(s: str) -> datetime:
+    """解析ISO格式时间戳
 
-class HitokotoData(TypedDict, total=False):
-    """一言API数据类型定义"""
-    hitokoto: str  # 一言内容
-    from_: str  # 来源，使用from_避免与Python关键字冲突
-    from_who: Optional[str]  # 作者
-    from_who_plain: str  # 格式化后的作者
-    type: str  # 类型代码
-    type_name: str  # 类型名称
-    uuid: str  # 唯一标识
+    同一批加载的收藏常出现重复的时间戳字符串（秒级精度下尤其如此），
+    缓存后重复解析退化为一次字典查找。
+    """
+    return datetime.fromisoformat(s)
 
 
+@dataclass
 class HitokotoFavorite:
-    """一言收藏数据模型"""
-    
-    def __init__(self, content: str, uuid: str, type_name: str, 
-                 source: str, creator: str, created_at: Optional[datetime] = None) -> None:
-        """
-        初始化一言收藏
-        
-        参数:
-            content: 一言内容
-            uuid: 一言UUID
-            type_name: 一言类型
-            source: 一言来源
-            creator: 一言创作者
-            created_at: 收藏时间，默认为当前时间
-        """
-        self.content = content  # 一言内容
-        self.uuid = uuid  # 一言UUID
-        self.type_name = type_name  # 一言类型
-        self.source = source  # 一言来源
-        self.creator = creator  # 一言创作者
-        self.created_at = created_at or datetime.now()  # 收藏时间
-        
+    """一言收藏数据模型
+
+    带slots的数据类：实例不再携带__dict__，
+    大量收藏常驻内存时每个对象可省约一半内存，属性访问也更快。
+
+    手动声明__slots__以保持Python 3.9兼容（dataclass的slots=True
+    参数需要3.10）；因此字段不能有类级默认值，created_at由调用方
+    显式传入。
+    """
+
+    __slots__ = ("content", "uuid", "type_name", "source", "creator", "created_at")
+
+    content: str  # 一言内容
+    uuid: str  # 一言UUID
+    type_name: str  # 一言类型
+    source: str  # 一言来源
+    creator: str  # 一言创作者
+    created_at: datetime  # 收藏时间
+
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
         return {
@@ -58,14 +77,31 @@ class HitokotoFavorite:
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "HitokotoFavorite":
-        """从字典创建实例"""
+        """从字典创建实例（兼容路径，容忍缺失的created_at字段）"""
+        created_at_str = data.get("created_at")
         return cls(
             content=data["content"],
             uuid=data["uuid"],
             type_name=data["type_name"],
             source=data["source"],
             creator=data["creator"],
-            created_at=datetime.fromisoformat(created_at_str) if (created_at_str := data.get("created_at")) else None
+            created_at=_parse_ts(created_at_str) if created_at_str else datetime.now()
+        )
+
+    @classmethod
+    def _from_stored(cls, data: Dict[str, Any]) -> "HitokotoFavorite":
+        """从自身写出的存储格式创建实例
+
+        信任路径：写盘侧始终输出全部字段，直接按键取值，
+        省去from_dict中逐字段的存在性检查分支。
+        """
+        return cls(
+            data["content"],
+            data["uuid"],
+            data["type_name"],
+            data["source"],
+            data["creator"],
+            _parse_ts(data["created_at"])
         )
 
 
@@ -74,55 +110,291 @@ class FavoriteManager:
     
     def __init__(self) -> None:
         """初始化收藏管理器"""
-        # 用户收藏数据 {user_id: [HitokotoFavorite, ...]}
+        # 用户收藏数据 {user_id: [HitokotoFavorite, ...]}，按需从磁盘加载
         self._favorites: Dict[str, List[HitokotoFavorite]] = {}
-        # 最后一次获取的一言内容 {user_id: HitokotoFavorite}
-        self._last_hitokoto: Dict[str, HitokotoFavorite] = {}
-        # 数据文件路径 - 使用localstore
-        self.data_file = self._get_data_file_path()
-        # 加载数据
-        self._load_data()
-        
+        # 用户收藏UUID索引 {user_id: {uuid, ...}}，用于O(1)判断是否已收藏
+        self._favorite_uuids: Dict[str, Set[str]] = {}
+        # 已从磁盘加载过的用户，收藏为空的用户也会记录在内，避免重复读盘
+        self._loaded_users: Set[str] = set()
+        # 最后一次获取的一言内容 {user_id: (获取时间戳, API原始数据)}
+        # 存原始dict而非收藏对象——绝大多数获取不会被收藏，对象在收藏时才构造；
+        # 记录带有效期（hitp_favorite_timeout），过期后视为不存在并由定时任务清理
+        self._last_hitokoto: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        # 分用户数据目录 - 每个用户一个收藏文件，写盘成本只与该用户的收藏量相关
+        self.data_dir = store.get_plugin_data_dir() / "favorites"
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        # 旧版单文件数据路径，存在时迁移到分用户布局
+        self.legacy_data_file = self._get_data_file_path()
+        # 预写日志路径：每次修改追加一条记录，崩溃后启动时重放，
+        # 弥补去抖动写盘窗口内掉电/崩溃造成的数据丢失
+        self.wal_file = store.get_plugin_data_file("favorites.log")
+        # 待写盘的用户集合与延迟保存任务，用于合并连续修改、跳过无修改时的写盘
+        self._dirty_users: Set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        # 注册过期记录清理任务
+        # （旧版数据迁移在on_startup钩子中的线程里执行，不阻塞插件加载）
+        self._setup_cleanup_job()
+
+    @staticmethod
+    def _key(platform: str, user_id: str) -> str:
+        """构造平台+用户的复合ID，各方法统一经此入口拼接"""
+        return f"{platform}:{user_id}"
+
+    def _setup_cleanup_job(self) -> None:
+        """注册定时清理任务，移除过期的最后一言记录"""
+        scheduler.add_job(
+            self._cleanup_last_hitokoto,
+            "interval",
+            seconds=LAST_HITOKOTO_CLEANUP_INTERVAL,
+            id="hitokoto_last_hitokoto_cleanup",
+            replace_existing=True
+        )
+
+    async def _cleanup_last_hitokoto(self) -> None:
+        """定时清理过期的最后一言记录，避免字典随用户数无限增长"""
+        if not self._last_hitokoto:
+            return
+
+        current_time = time.time()
+        timeout = plugin_config.hitp_favorite_timeout
+        expired_users = [
+            composite_id for composite_id, (timestamp, _) in self._last_hitokoto.items()
+            if current_time - timestamp > timeout
+        ]
+
+        for composite_id in expired_users:
+            del self._last_hitokoto[composite_id]
+
+        if expired_users:
+            logger.debug(f"已清理 {len(expired_users)} 条过期的最后一言记录，当前记录数: {len(self._last_hitokoto)}")
+
     def _get_data_file_path(self) -> Path:
-        """获取数据文件路径"""
+        """获取旧版单文件数据路径"""
         return store.get_plugin_data_file("favorites.json")
-    
-    def _load_data(self) -> None:
-        """加载收藏数据"""
-        if not self.data_file.exists():
-            logger.debug("收藏数据文件不存在，将创建新文件")
+
+    def _user_file(self, composite_id: str) -> Path:
+        """获取用户收藏文件路径，复合ID经URL转义后作为文件名"""
+        return self.data_dir / f"{quote(composite_id, safe='')}.json"
+
+    def _migrate_legacy_data(self) -> None:
+        """将旧版单文件favorites.json迁移为每用户一个文件（一次性）"""
+        if not self.legacy_data_file.exists():
             return
-        
+
         try:
-            with open(self.data_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            
-            # 使用字典推导式加载收藏数据
-            self._favorites = {
-                user_id: [HitokotoFavorite.from_dict(fav) for fav in favorites]
-                for user_id, favorites in data.items()
-            }
-            
-            logger.debug(f"成功加载收藏数据: {len(self._favorites)}个用户")
+            # 旧文件整体读入只在迁移时发生一次；迁移后的分用户布局
+            # 不再存在需要流式解析的大文件，常规路径每次只读单个小文件
+            raw = self.legacy_data_file.read_bytes()
+            data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+            for composite_id, favorites in data.items():
+                user_file = self._user_file(composite_id)
+                if user_file.exists():
+                    continue
+                # 旧记录逐条经from_dict归一化（容忍缺失的created_at等字段），
+                # 写出的用户文件保证字段齐全，之后才能走_from_stored的信任路径加载
+                normalized = [
+                    HitokotoFavorite.from_dict(fav).to_dict() for fav in favorites
+                ]
+                if orjson is not None:
+                    payload = orjson.dumps(normalized, option=orjson.OPT_INDENT_2)
+                else:
+                    payload = json.dumps(normalized, ensure_ascii=False, indent=2).encode("utf-8")
+                self._write_payload(user_file, payload)
+
+            # 保留旧文件为备份，避免重复迁移
+            self.legacy_data_file.rename(self.legacy_data_file.with_suffix(".json.bak"))
+            logger.info(f"已将旧版收藏数据迁移为分用户存储: {len(data)}个用户")
         except Exception as e:
-            logger.error(f"加载收藏数据失败: {e}")
-    
-    def _save_data(self) -> None:
-        """保存收藏数据"""
+            logger.error(f"迁移旧版收藏数据失败: {e}")
+
+    def _ensure_user_loaded(self, composite_id: str) -> None:
+        """按需加载用户的收藏文件，只在首次访问该用户时读盘"""
+        if composite_id in self._loaded_users:
+            return
+        self._loaded_users.add(composite_id)
+
+        user_file = self._user_file(composite_id)
+        if not user_file.exists():
+            return
+
         try:
-            # 使用字典推导式创建要保存的数据
-            data = {
-                user_id: [fav.to_dict() for fav in favorites]
-                for user_id, favorites in self._favorites.items()
-            }
-            
-            # 确保父目录存在
-            self.data_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(self.data_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            
-            logger.debug("收藏数据保存成功")
+            raw = user_file.read_bytes()
+            items = orjson.loads(raw) if orjson is not None else json.loads(raw)
+            # 用户文件由本插件写出，走信任路径的直接构造
+            favorites = [HitokotoFavorite._from_stored(fav) for fav in items]
+            self._favorites[composite_id] = favorites
+            self._favorite_uuids[composite_id] = {fav.uuid for fav in favorites}
+            logger.debug(f"已加载用户 {composite_id} 的收藏: {len(favorites)}条")
+        except Exception as e:
+            logger.error(f"加载用户 {composite_id} 的收藏数据失败: {e}")
+            # 把读不出的文件改名保留，避免该用户后续的收藏操作
+            # 以空列表起步写盘时覆盖掉未能读出的数据
+            try:
+                user_file.rename(user_file.with_suffix(".json.corrupt"))
+                logger.warning(f"已将无法读取的收藏文件保留为 {user_file.name}.corrupt")
+            except OSError:
+                pass
+
+    def _mark_dirty(self, composite_id: str) -> None:
+        """标记用户数据已修改，并调度一次延迟保存（合并短时间内的连续修改）"""
+        self._dirty_users.add(composite_id)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+    def _append_wal(self, record: Dict[str, Any]) -> None:
+        """将一条变更追加写入预写日志
+
+        每次修改只追加一行JSONL（O(单条记录)字节），
+        与快照重写不同，成本与收藏总量无关。
+        """
+        try:
+            if orjson is not None:
+                line = orjson.dumps(record) + b"\n"
+            else:
+                line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+            with open(self.wal_file, "ab") as f:
+                f.write(line)
+        except Exception as e:
+            logger.error(f"写入收藏预写日志失败: {e}")
+
+    def _truncate_wal(self) -> None:
+        """清空预写日志（对应的修改已全部写入用户快照）"""
+        try:
+            if self.wal_file.exists():
+                self.wal_file.write_bytes(b"")
+        except Exception as e:
+            logger.error(f"清空收藏预写日志失败: {e}")
+
+    def _replay_wal(self) -> None:
+        """启动时重放预写日志，恢复上次未及写入快照的修改"""
+        if not self.wal_file.exists():
+            return
+
+        try:
+            raw = self.wal_file.read_bytes()
+        except Exception as e:
+            logger.error(f"读取收藏预写日志失败: {e}")
+            return
+        if not raw.strip():
+            return
+
+        replayed = 0
+        for line in raw.splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = orjson.loads(line) if orjson is not None else json.loads(line)
+                self._apply_wal_record(record)
+                replayed += 1
+            except Exception as e:
+                logger.warning(f"跳过无法重放的预写日志记录: {e}")
+
+        if replayed:
+            logger.info(f"已从预写日志重放 {replayed} 条收藏变更")
+
+    def _apply_wal_record(self, record: Dict[str, Any]) -> None:
+        """将单条预写日志记录应用到内存数据（幂等，重复重放无副作用）"""
+        composite_id = record["uid"]
+        self._ensure_user_loaded(composite_id)
+
+        if record["op"] == "add":
+            favorite = HitokotoFavorite._from_stored(record["fav"])
+            uuids = self._favorite_uuids.setdefault(composite_id, set())
+            # 快照可能已经包含该条记录（崩溃发生在写盘后、清日志前）
+            if favorite.uuid in uuids:
+                return
+            self._favorites.setdefault(composite_id, []).append(favorite)
+            uuids.add(favorite.uuid)
+            self._dirty_users.add(composite_id)
+        elif record["op"] == "remove":
+            favorites = self._favorites.get(composite_id)
+            if not favorites:
+                return
+            uuid = record["uuid"]
+            for i, favorite in enumerate(favorites):
+                if favorite.uuid == uuid:
+                    favorites.pop(i)
+                    uuids = self._favorite_uuids.get(composite_id)
+                    if uuids is not None:
+                        uuids.discard(uuid)
+                    self._dirty_users.add(composite_id)
+                    break
+
+    async def _delayed_flush(self) -> None:
+        """延迟保存任务"""
+        await asyncio.sleep(FLUSH_DEBOUNCE)
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"延迟保存收藏数据失败: {e}")
+
+    async def flush(self) -> None:
+        """如有未保存的修改则立即保存"""
+        if not self._dirty_users:
+            return
+        # 先取走脏集合，写盘期间的新修改会进入下一轮flush
+        dirty = self._dirty_users
+        self._dirty_users = set()
+        try:
+            await self._save_users(dirty)
+        except Exception:
+            # 保存失败时合并回脏集合，下次仍会重试
+            self._dirty_users |= dirty
+            raise
+        logger.debug(f"已保存 {len(dirty)} 个用户的收藏数据")
+        # 所有修改都已进入用户快照时，预写日志即可清空
+        if not self._dirty_users:
+            self._truncate_wal()
+
+    async def _save_users(self, composite_ids: Set[str]) -> None:
+        """保存指定用户的收藏数据（序列化在事件循环内完成，文件写入在线程中执行）
+
+        只重写有修改的用户文件，单次写盘成本与该用户的收藏量相关，
+        与总用户数无关。
+        """
+        # 序列化在事件循环内同步完成，写盘线程只接触不可变的字节串，
+        # 避免写盘期间收藏数据被处理器并发修改导致序列化出错
+        payloads = [
+            (self._user_file(composite_id), self._serialize_user(self._favorites.get(composite_id, [])))
+            for composite_id in composite_ids
+        ]
+        await asyncio.to_thread(self._write_payloads, payloads)
+
+    @staticmethod
+    def _serialize_user(favorites: List[HitokotoFavorite]) -> bytes:
+        """将单个用户的收藏列表序列化为JSON字节串"""
+        if orjson is not None:
+            # orjson原生支持数据类和datetime，直接传入实例即可，
+            # 省去每条收藏to_dict()的中间字典分配和isoformat()调用；
+            # datetime按RFC3339输出，加载时fromisoformat可直接解析
+            return orjson.dumps(favorites, option=orjson.OPT_INDENT_2)
+
+        # 标准库回退路径仍需逐条转换为字典
+        return json.dumps(
+            [fav.to_dict() for fav in favorites], ensure_ascii=False, indent=2
+        ).encode("utf-8")
+
+    def _write_payloads(self, payloads: List[Tuple[Path, bytes]]) -> None:
+        """将一批序列化结果逐个原子写入对应的用户文件"""
+        for path, payload in payloads:
+            self._write_payload(path, payload)
+
+    @staticmethod
+    def _write_payload(path: Path, payload: bytes) -> None:
+        """将序列化结果原子写入指定文件"""
+        tmp_path = path.with_suffix(".json.tmp")
+        try:
+            # 先写入临时文件再原子替换，写入中途崩溃也不会损坏原数据；
+            # 替换前fsync确保字节已落盘——该方法只在去抖动的flush中执行，
+            # fsync的开销被合并的多次修改摊薄，不会出现在每次收藏操作上
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+
+            logger.debug(f"收藏数据保存成功: {path.name}")
         except Exception as e:
             logger.error(f"保存收藏数据失败: {e}")
             # 抛出异常以便调用者感知到错误
@@ -137,19 +409,17 @@ class FavoriteManager:
             user_id: 用户ID
             hitokoto_data: 一言数据
         """
-        # 创建复合ID
-        composite_id = f"{platform}:{user_id}"
-        
-        # 将API返回的数据转换为HitokotoFavorite对象
-        self._last_hitokoto[composite_id] = HitokotoFavorite(
-            content=hitokoto_data["hitokoto"],
-            uuid=hitokoto_data.get("uuid", ""),
-            type_name=hitokoto_data.get("type_name", "未知类型"),
-            source=hitokoto_data.get("from", "未知来源"),
-            creator=hitokoto_data.get("from_who_plain", "无")
-        )
+        composite_id = self._key(platform, user_id)
+
+        # 直接记录API原始数据和获取时间，收藏对象推迟到add_favorite时构造；
+        # 删除后重新插入使该用户移到字典的最新端（dict保序），
+        # 使条数上限的淘汰始终命中最久未活跃的用户
+        self._last_hitokoto.pop(composite_id, None)
+        self._last_hitokoto[composite_id] = (time.time(), hitokoto_data)
+        if len(self._last_hitokoto) > LAST_HITOKOTO_MAX_ENTRIES:
+            del self._last_hitokoto[next(iter(self._last_hitokoto))]
     
-    def get_last_hitokoto(self, platform: str, user_id: str) -> Optional[HitokotoFavorite]:
+    def get_last_hitokoto(self, platform: str, user_id: str) -> Optional[Dict[str, Any]]:
         """
         获取最后一次获取的一言
         
@@ -158,11 +428,19 @@ class FavoriteManager:
             user_id: 用户ID
             
         返回:
-            Optional[HitokotoFavorite]: 上次获取的一言对象，不存在则返回None
+            Optional[Dict[str, Any]]: 上次获取的一言数据，不存在或已过期则返回None
         """
-        # 创建复合ID
-        composite_id = f"{platform}:{user_id}"
-        return self._last_hitokoto.get(composite_id)
+        composite_id = self._key(platform, user_id)
+        entry = self._last_hitokoto.get(composite_id)
+        if entry is None:
+            return None
+
+        timestamp, hitokoto_data = entry
+        # 超过收藏时限的记录视为不存在
+        if time.time() - timestamp > plugin_config.hitp_favorite_timeout:
+            del self._last_hitokoto[composite_id]
+            return None
+        return hitokoto_data
     
     def is_favorite_exists(self, platform: str, user_id: str, uuid: str) -> bool:
         """
@@ -176,33 +454,49 @@ class FavoriteManager:
         返回:
             bool: 是否已收藏
         """
-        # 创建复合ID
-        composite_id = f"{platform}:{user_id}"
-        favorites = self._favorites.get(composite_id, [])
-        
-        # 使用命名表达式和any更简洁地检查是否存在
-        return any(fav.uuid == uuid for fav in favorites)
+        composite_id = self._key(platform, user_id)
+        self._ensure_user_loaded(composite_id)
+        # 通过UUID索引做O(1)查询，避免遍历收藏列表；
+        # 单次get取出索引，未命中时不构造临时空集合
+        uuids = self._favorite_uuids.get(composite_id)
+        return uuids is not None and uuid in uuids
     
-    def add_favorite(self, platform: str, user_id: str, hitokoto: HitokotoFavorite) -> None:
+    async def add_favorite(self, platform: str, user_id: str, hitokoto_data: Dict[str, Any]) -> None:
         """
         添加收藏
         
         参数:
             platform: 平台标识
             user_id: 用户ID
-            hitokoto: 要收藏的一言
+            hitokoto_data: 要收藏的一言API数据
         """
-        # 创建复合ID
-        composite_id = f"{platform}:{user_id}"
-        
-        # 如果用户没有收藏列表，创建新列表；否则添加到现有列表
-        if composite_id in self._favorites:
-            self._favorites[composite_id].append(hitokoto)
-        else:
-            self._favorites[composite_id] = [hitokoto]
-        
-        # 保存数据
-        self._save_data()
+        composite_id = self._key(platform, user_id)
+        self._ensure_user_loaded(composite_id)
+
+        # 借助UUID索引做O(1)去重，重复收藏直接忽略，
+        # 不依赖调用方先行调用is_favorite_exists
+        uuids = self._favorite_uuids.setdefault(composite_id, set())
+        uuid = hitokoto_data.get("uuid", "")
+        if uuid in uuids:
+            return
+
+        # 收藏对象在此刻才构造，获取后未收藏的一言不产生任何对象分配
+        hitokoto = HitokotoFavorite(
+            content=hitokoto_data["hitokoto"],
+            uuid=uuid,
+            type_name=hitokoto_data.get("type_name", "未知类型"),
+            source=hitokoto_data.get("from", "未知来源"),
+            creator=hitokoto_data.get("from_who_plain", "无"),
+            created_at=datetime.now()
+        )
+        # 如果用户没有收藏列表则创建新列表，单次哈希查找完成插入
+        self._favorites.setdefault(composite_id, []).append(hitokoto)
+        # 同步维护UUID索引
+        uuids.add(uuid)
+
+        # 先追加预写日志（单条小追加写），再标记延迟保存
+        self._append_wal({"op": "add", "uid": composite_id, "fav": hitokoto.to_dict()})
+        self._mark_dirty(composite_id)
     
     def get_favorites(self, platform: str, user_id: str) -> List[HitokotoFavorite]:
         """
@@ -215,9 +509,32 @@ class FavoriteManager:
         返回:
             List[HitokotoFavorite]: 用户的收藏列表
         """
-        # 创建复合ID
-        composite_id = f"{platform}:{user_id}"
+        composite_id = self._key(platform, user_id)
+        self._ensure_user_loaded(composite_id)
         return self._favorites.get(composite_id, [])
+
+    def get_favorites_page(
+        self, platform: str, user_id: str, page: int, page_size: int
+    ) -> Tuple[List[HitokotoFavorite], int]:
+        """
+        获取用户收藏列表的指定分页
+
+        只切出当前页需要的条目，调用方无需拿到整个列表再自行分页。
+
+        参数:
+            platform: 平台标识
+            user_id: 用户ID
+            page: 页码，从1开始
+            page_size: 每页条数
+
+        返回:
+            Tuple[List[HitokotoFavorite], int]: 当前页的收藏列表和收藏总数
+        """
+        composite_id = self._key(platform, user_id)
+        self._ensure_user_loaded(composite_id)
+        favorites = self._favorites.get(composite_id, [])
+        start_idx = (page - 1) * page_size
+        return favorites[start_idx:start_idx + page_size], len(favorites)
     
     def get_favorite_by_index(self, platform: str, user_id: str, index: int) -> Optional[HitokotoFavorite]:
         """
@@ -231,13 +548,13 @@ class FavoriteManager:
         返回:
             Optional[HitokotoFavorite]: 找到的收藏对象，未找到则返回None
         """
-        # 创建复合ID
-        composite_id = f"{platform}:{user_id}"
+        composite_id = self._key(platform, user_id)
+        self._ensure_user_loaded(composite_id)
         favorites = self._favorites.get(composite_id, [])
         # 使用条件表达式简化逻辑
         return favorites[index] if 0 <= index < len(favorites) else None
     
-    def remove_favorite(self, platform: str, user_id: str, index: int) -> bool:
+    async def remove_favorite(self, platform: str, user_id: str, index: int) -> bool:
         """
         删除收藏
         
@@ -249,19 +566,46 @@ class FavoriteManager:
         返回:
             bool: 删除成功返回True，否则返回False
         """
-        # 创建复合ID
-        composite_id = f"{platform}:{user_id}"
+        composite_id = self._key(platform, user_id)
+        self._ensure_user_loaded(composite_id)
         favorites = self._favorites.get(composite_id, [])
         
         # 使用if-else引入逻辑
         if 0 <= index < len(favorites):
-            favorites.pop(index)
-            # 保存数据
-            self._save_data()
+            removed = favorites.pop(index)
+            # 同步维护UUID索引，单次get取出索引，未命中时不构造临时空集合
+            uuids = self._favorite_uuids.get(composite_id)
+            if uuids is not None:
+                uuids.discard(removed.uuid)
+            # 先追加预写日志（单条小追加写），再标记延迟保存
+            self._append_wal({"op": "remove", "uid": composite_id, "uuid": removed.uuid})
+            self._mark_dirty(composite_id)
             return True
         else:
             return False
 
 
 # 创建全局收藏管理器实例
-favorite_manager = FavoriteManager() 
\ No newline at end of file
+favorite_manager = FavoriteManager()
+
+driver = get_driver()
+
+
+@driver.on_startup
+async def _init_favorites() -> None:
+    """启动时在线程中迁移旧版收藏数据并重放预写日志，避免阻塞事件循环
+
+    迁移和重放都可能读入较大的数据集，是收藏存储中仅剩的大块磁盘操作；
+    分用户文件的按需读取数据量很小，留在调用方同步完成即可。
+    """
+    await asyncio.to_thread(favorite_manager._migrate_legacy_data)
+    await asyncio.to_thread(favorite_manager._replay_wal)
+    # 重放出的修改立即写入快照；快照齐全后日志可以安全清空
+    await favorite_manager.flush()
+    favorite_manager._truncate_wal()
+
+
+@driver.on_shutdown
+async def _flush_favorites() -> None:
+    """退出前保存尚未写盘的收藏数据"""
+    await favorite_manager.flush() 
\ No newline at end of file
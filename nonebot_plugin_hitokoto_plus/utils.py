@@ -0,0 +1,12 @@
+from typing import Set
+
+from nonebot import get_driver
+
+# 获取全局配置
+global_config = get_driver().config
+
+# 命令前缀在启动后不会变化，在模块加载时计算一次供各处复用
+# 获取命令前缀集合，如果没有配置则默认为 ["/"]
+cmd_start: Set[str] = getattr(global_config, "command_start", {"/", })
+# 使用第一个命令前缀作为帮助显示
+cmd_prefix: str = next(iter(cmd_start)) if cmd_start else "/"